@@ -9,26 +9,279 @@
 # Import necessary libraries
 
 # csv parsing
+from collections import defaultdict
+from functools import cache
+import numpy as np
 import pandas as pd
 
+# Model caching
+import hashlib
+import json
+import os
+import joblib
+from scipy import sparse
+
 # NLP
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
+from joblib import Parallel, delayed, effective_n_jobs
+from sklearn.feature_extraction.text import CountVectorizer, TfidfVectorizer
+from sklearn.metrics.pairwise import linear_kernel
+from sklearn.preprocessing import normalize
+
+# Optional MKL sparse products, falls back to scipy when unavailable
+try:
+    from sparse_dot_mkl import dot_product_mkl
+except ImportError:
+    dot_product_mkl = None
+
+# Optional compiled search kernel, falls back to the joblib chunked search when unavailable
+try:
+    from numba import get_num_threads, njit, prange
+except ImportError:
+    njit = None
 
 # Cover image display
 from PIL import Image
+from IPython import get_ipython
 from IPython.display import display
 import requests
+from requests.adapters import HTTPAdapter
+from concurrent.futures import ThreadPoolExecutor
 from io import BytesIO
 
 # Reading in the CSV
-cols = ['bookId', 'author', 'title', 'rating', 'description', 'isbn', 'genres', 'coverImg']
-data = pd.read_csv("book_data.csv", index_col="bookId", usecols=cols).dropna()
+# A book is kept as long as it has a title and a description; a repeated bookId keeps its first such row
+# The display-only columns are split off so the frame used for matching and similarity stays small
+cols = ['bookId', 'author', 'title', 'rating', 'description', 'genres', 'coverImg']
+CSV_PATH = "book_data.csv"
+# Arrow-backed dtypes keep strings in arrow buffers, so the `.str` methods run in C
+books = pd.read_csv(CSV_PATH, index_col="bookId", usecols=cols, dtype_backend="pyarrow").dropna(subset=['title', 'description'])
+books = books[~books.index.duplicated()]
+data = books[['title', 'description', 'genres']].assign(genres=books['genres'].fillna('[]'))
+book_details = books[['author', 'rating', 'coverImg']]
+del books
 
 # Major NLP generating term frequency-inverse document frequency matrix
+# Kept as float32 CSR with sorted int32 indices to halve the memory traffic of every product
+
+def fit_tfidf(descriptions) -> tuple:
+    """
+    Fit the TF-IDF model.
+
+    Args:
+    - descriptions: An array of strings representing the book descriptions.
+
+    Returns:
+    - A tuple of the fitted `TfidfVectorizer` and its float32 CSR matrix.
+    """
+    tfidf = TfidfVectorizer(stop_words='english', dtype=np.float32)
+    tfidf_matrix = tfidf.fit_transform(descriptions).tocsr()
+    tfidf_matrix.sort_indices()
+    tfidf_matrix.indices = tfidf_matrix.indices.astype(np.int32, copy=False)
+    tfidf_matrix.indptr = tfidf_matrix.indptr.astype(np.int32, copy=False)
+    return tfidf, tfidf_matrix
+
+# Precompute the nearest neighbours of every book once, so queries become a lookup
+# TF-IDF rows are L2-normalised, hence cosine similarity is just the dot product
+
+TOP_K = 21
+
+def top_similar(matrix, top_k:int = TOP_K, chunk_size:int = 1024) -> tuple:
+    """
+    Get the top similar rows of a matrix.
+    This function computes the similarity of every row against every other row in blocks of `chunk_size` rows, 
+    keeping only the `top_k` best matches of each row so the full N x N matrix is never held in memory.
+    The products go through MKL when `sparse_dot_mkl` is installed and through scipy otherwise, both against a transposed copy made once.
+
+    Args:
+    - matrix: A sparse matrix with L2-normalised rows.
+    - top_k: An integer representing the number of neighbours to keep per row (default = TOP_K).
+    - chunk_size: An integer representing the number of rows to process at once (default = 1024).
+
+    Returns:
+    - A tuple of two (N, top_k) arrays holding the row positions and scores of the neighbours, best first.
+    """
+    n = matrix.shape[0]
+    top_k = min(top_k, n)
+    topk_idx = np.empty((n, top_k), dtype=np.int32)
+    topk_scores = np.empty((n, top_k), dtype=np.float32)
+    # Transpose once up front rather than once per block
+    matrix_t = matrix.T.tocsr()
+    for start in range(0, n, chunk_size):
+        if dot_product_mkl is not None:
+            scores = dot_product_mkl(matrix[start:start+chunk_size], matrix_t, dense=True)
+        else:
+            scores = (matrix[start:start+chunk_size] @ matrix_t).toarray()
+        cand = np.argpartition(scores, -top_k, axis=1)[:, -top_k:]
+        cand_scores = np.take_along_axis(scores, cand, axis=1)
+        order = np.argsort(-cand_scores, axis=1, kind='stable')
+        topk_idx[start:start+chunk_size] = np.take_along_axis(cand, order, axis=1)
+        topk_scores[start:start+chunk_size] = np.take_along_axis(cand_scores, order, axis=1)
+    return topk_idx, topk_scores
+
+# Cache the fitted model, matrix and neighbours on disk so restarts skip the fit
+# The cache is keyed by the CSV's mtime, size and hash, the bookIds of the parsed rows (the neighbours are positional),
+# and CACHE_VERSION for changes to the build itself
+
+CACHE_DIR = "tfidf_cache"
+CACHE_VERSION = 3
+
+def file_sha256(path:str) -> str:
+    """
+    Hash a file.
+
+    Args:
+    - path: A string representing the file path.
+
+    Returns:
+    - A string representing the hex SHA-256 digest of the file contents.
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def rows_sha256() -> str:
+    """
+    Hash the bookIds of the parsed rows, in order.
+
+    Returns:
+    - A string representing the hex SHA-256 digest of the `data` index.
+    """
+    return hashlib.sha256("\n".join(data.index.astype(str)).encode()).hexdigest()
+
+def write_meta(meta_path:str, stat, csv_sha256:str, rows:str) -> None:
+    """
+    Write the cache metadata.
+
+    Args:
+    - meta_path: A string representing the path of the cache metadata file.
+    - stat: The `os.stat` result of the CSV.
+    - csv_sha256: A string representing the hash of the CSV.
+    - rows: A string representing the hash of the parsed rows' bookIds.
+
+    Returns:
+    - None.
+    """
+    with open(meta_path, 'w') as f:
+        json.dump({'version': CACHE_VERSION, 'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size,
+                   'sha256': csv_sha256, 'rows': len(data), 'rows_sha256': rows}, f)
+
+def cache_is_valid(meta_path:str, stat, rows:str) -> bool:
+    """
+    Check whether the on-disk cache was built from the current CSV and parsed rows.
+    An unchanged mtime and size are trusted as is; otherwise the CSV is rehashed and compared. 
+    If only the mtime changed, the metadata is rewritten so later starts skip the rehash.
+
+    Args:
+    - meta_path: A string representing the path of the cache metadata file.
+    - stat: The `os.stat` result of the CSV.
+    - rows: A string representing the hash of the parsed rows' bookIds.
+
+    Returns:
+    - True if the cache can be loaded, False otherwise.
+    """
+    if not os.path.exists(meta_path):
+        return False
+    with open(meta_path) as f:
+        meta = json.load(f)
+    if meta.get('version') != CACHE_VERSION or meta.get('rows') != len(data) or meta.get('rows_sha256') != rows:
+        return False
+    if meta.get('mtime_ns') == stat.st_mtime_ns and meta.get('size') == stat.st_size:
+        return True
+    csv_sha256 = file_sha256(CSV_PATH)
+    if meta.get('sha256') != csv_sha256:
+        return False
+    write_meta(meta_path, stat, csv_sha256, rows)
+    return True
+
+def build_or_load() -> tuple:
+    """
+    Build or load the TF-IDF model, matrix and precomputed neighbours.
+    Loads them from `CACHE_DIR` when the cache matches the CSV, otherwise fits them and writes the cache.
+
+    Returns:
+    - A tuple of the `TfidfVectorizer`, its matrix, and the neighbour positions and scores.
+    """
+    meta_path = os.path.join(CACHE_DIR, 'meta.json')
+    stat = os.stat(CSV_PATH)
+    rows = rows_sha256()
+    if cache_is_valid(meta_path, stat, rows):
+        tfidf = joblib.load(os.path.join(CACHE_DIR, 'tfidf.joblib'))
+        tfidf_matrix = sparse.load_npz(os.path.join(CACHE_DIR, 'tfidf.npz')).tocsr()
+        with np.load(os.path.join(CACHE_DIR, 'topk.npz')) as topk:
+            return tfidf, tfidf_matrix, topk['idx'], topk['scores']
+
+    tfidf, tfidf_matrix = fit_tfidf(data['description'].values.astype('U'))
+    topk_idx, topk_scores = top_similar(tfidf_matrix)
+
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    joblib.dump(tfidf, os.path.join(CACHE_DIR, 'tfidf.joblib'))
+    sparse.save_npz(os.path.join(CACHE_DIR, 'tfidf.npz'), tfidf_matrix)
+    np.savez(os.path.join(CACHE_DIR, 'topk.npz'), idx=topk_idx, scores=topk_scores)
+    # Metadata last, so an interrupted write leaves no valid cache behind
+    write_meta(meta_path, stat, file_sha256(CSV_PATH), rows)
+    return tfidf, tfidf_matrix, topk_idx, topk_scores
+
+tfidf, tfidf_matrix, topk_idx, topk_scores = build_or_load()
+
+# Genre matrix: L2-normalised multi-hot rows over the genre tags, so cosine similarity is a dot product
+# Only a few hundred distinct genres and a handful per book, so it is cheap enough to build at every start
+
+def parse_genres(genres:str) -> list:
+    """
+    Parse a genre list.
+    Splits the stringified list stored in the `genres` column, e.g. "['Classics', 'Fiction']", into its tags.
+
+    Args:
+    - genres: A string representing the stored genre list.
+
+    Returns:
+    - A list of strings representing the genre tags.
+    """
+    return [genre.strip().strip("'\"") for genre in genres.strip("[]").split(",") if genre.strip()]
+
+genre_vectorizer = CountVectorizer(analyzer=parse_genres, binary=True, dtype=np.float32)
+genre_matrix = normalize(genre_vectorizer.fit_transform(data['genres'].to_numpy()), norm='l2').tocsr()
 
-tfidf = TfidfVectorizer(stop_words='english')
-tfidf_matrix = tfidf.fit_transform(data['description'].values.astype('U'))
+# Plain numpy copies of the bookIds and titles, plus a title -> bookId lookup, built once instead of per query
+# The first book wins when several share a title
+
+book_ids = data.index.to_numpy()
+titles = data['title'].to_numpy()
+# Fixed-width unicode array so substring checks can run in numpy's C string kernels
+titles_lower = data['title'].str.lower().to_numpy().astype(str)
+title_to_id = dict(zip(titles_lower[::-1], book_ids[::-1]))
+
+# Trigram inverted index over the lowercased titles: trigram -> positions of the titles containing it
+# Lets substring lookups verify a handful of candidates instead of scanning every title
+# Built on the first lookup that needs it rather than at import, as building it costs far more than one scan
+
+def trigrams(text:str) -> set:
+    """
+    Get the set of character trigrams of a string.
+
+    Args:
+    - text: A string to split into trigrams.
+
+    Returns:
+    - A set of strings representing every 3-character substring of `text`.
+    """
+    return {text[i:i+3] for i in range(len(text) - 2)}
+
+@cache
+def title_index() -> dict:
+    """
+    Build the trigram index of the titles, once.
+
+    Returns:
+    - A dict mapping each trigram to the set of positions of the titles containing it.
+    """
+    index = defaultdict(set)
+    for position, name_lower in enumerate(titles_lower):
+        for gram in trigrams(name_lower):
+            index[gram].add(position)
+    return index
 
 # Get names possible to the given book; Handles misspelled, incorrect case and other minor deviations
 
@@ -36,6 +289,7 @@ def get_possible_books(book:str) -> list:
     """
     Get possible books.
     This function takes a book title as input and returns a list of possible books whose titles contain the given input as a substring. It performs a case-insensitive search by converting both the input and book titles to lowercase before comparing them.
+    Only titles sharing every trigram of the input are checked, inputs shorter than three characters fall back to a full scan.
 
     Args:
     - book: A string representing the book title to search for.
@@ -45,11 +299,15 @@ def get_possible_books(book:str) -> list:
     """
     
     book = book.lower()
-    possible_books = []
-    for name in data['title']:
-        if book in name.lower():
-            possible_books.append(name)
-    return possible_books
+    grams = trigrams(book)
+    if not grams:
+        matches = np.flatnonzero(np.char.find(titles_lower, book) >= 0)
+    else:
+        index = title_index()
+        postings = sorted((index.get(gram, set()) for gram in grams), key=len)
+        candidates = np.sort(np.fromiter(postings[0].intersection(*postings[1:]), dtype=np.intp))
+        matches = candidates[np.char.find(titles_lower[candidates], book) >= 0]
+    return titles[matches].tolist()
 
 # Generates the correct book name to be used for bookId indexing
 # Tries to fix the name as close as it can or prompts the user from the closest available matches
@@ -74,7 +332,7 @@ def correct_name(book_name:str):
     Note: This function assumes that the `data` dataframe contains a column named `title` representing book titles. 
     It also relies on the `get_possible_books()` function defined elsewhere in the code.
     """
-    if book_name not in data['title'].str.lower().tolist():
+    if book_name not in title_to_id:
         possible_books = get_possible_books(book_name)
 
         if len(possible_books) == 1:
@@ -120,23 +378,63 @@ def name_to_bookId(book_name = None) -> str:
 
         # Correct the name to nearest approximation by repeatedly asking or giving up
         print(book_name)
-        if correct_name(book_name) == 0:
+        status = correct_name(book_name)
+        if status == 0:
             return None
-        elif correct_name(book_name) == 1:
-            name_to_bookId()
-        
-        bookId = data[data['title'].str.contains(book_name, case=False)].index[0]
-        return bookId
+        elif status == 1:
+            return name_to_bookId()
+        elif status is not None:
+            # The single title containing the input
+            book_name = status.lower()
+
+        return title_to_id[book_name]
     except:
         print("Invalid input.")
 
+# Covers are only downloaded when running under IPython/Jupyter, where `display` can render them
+
+INTERACTIVE = get_ipython() is not None
+
+# Shared HTTP session so cover downloads reuse pooled connections
+
+session = requests.Session()
+session.mount("http://", HTTPAdapter(pool_connections=16, pool_maxsize=16))
+session.mount("https://", HTTPAdapter(pool_connections=16, pool_maxsize=16))
+
+# Seconds to wait on a cover before giving up on it
+COVER_TIMEOUT = 10
+
+def fetch_cover(cover_url:str):
+    """
+    Fetch a cover image.
+    A missing, unreachable or undecodable cover yields None so it cannot hold up or break the other books' output.
+
+    Args:
+    - cover_url: A string representing the URL of the cover image.
+
+    Returns:
+    - A PIL image of the downloaded cover, or None if it could not be fetched.
+    """
+    if pd.isna(cover_url):
+        return None
+    try:
+        response = session.get(cover_url, timeout=COVER_TIMEOUT)
+        response.raise_for_status()
+        img = Image.open(BytesIO(response.content))
+        img.load()
+        return img
+    except (requests.RequestException, OSError):
+        return None
+
 # Print book relevant details and uses the coverImg url to print the coverpage
 
 def print_book_details(bookId_list:list[str]) -> None:
     """
     Print book details.
     This function takes a list of book IDs as input and prints the corresponding book details. 
-    For each book ID in the input list, it looks up the relevant details.
+    The relevant details of every book ID in the input list are looked up in a single selection. 
+    The cover images are downloaded concurrently up front, then printed in order. 
+    Outside IPython/Jupyter the covers are skipped and only the details are printed.
 
     Args:
     - bookId_list: A list of strings representing the book IDs to print details for.
@@ -144,22 +442,166 @@ def print_book_details(bookId_list:list[str]) -> None:
     Returns:
     - None.
     """
-    for bookId in bookId_list:
-        book_title = data.loc[bookId]['title']
-        book_author = data.loc[bookId]['author']
-        book_rating = data.loc[bookId]['rating']
-        book_genres = data.loc[bookId]['genres']
-        cover_url = data.loc[bookId]['coverImg']
-        response = requests.get(cover_url)
-        img = Image.open(BytesIO(response.content))
-        display(img)
-        print(f"Title: {book_title}")
-        print(f"Author: {book_author}")
-        print(f"Rating: {book_rating}")
-        print(f"Genres: {book_genres}")
+    bookId_list = list(bookId_list)
+    if not bookId_list:
+        return
+
+    details = data.loc[bookId_list, ['title', 'genres']].join(book_details, how='left')
+
+    # Download every cover concurrently before printing
+    covers = [None] * len(details)
+    if INTERACTIVE:
+        with ThreadPoolExecutor(max_workers=min(8, len(details))) as executor:
+            covers = list(executor.map(fetch_cover, details['coverImg']))
+
+    for book, img in zip(details.itertuples(index=False), covers):
+        if img is not None:
+            display(img)
+        print(f"Title: {book.title}")
+        print(f"Author: {book.author}")
+        print(f"Rating: {book.rating}")
+        print(f"Genres: {book.genres}")
         print("\n")
 
 
+# Score a query against the whole corpus, split into contiguous row chunks across worker threads
+# Small corpora stay single-threaded as the dispatch overhead outweighs the work
+
+PARALLEL_MIN_ROWS = 2000
+
+def chunk_top_k(matrix, query, offset:int, n:int) -> tuple:
+    """
+    Get the top matches within a chunk.
+    Scores `query` against every row of `matrix` by dot product, i.e. cosine similarity for L2-normalised rows, and keeps the `n` best, unordered. 
+    Among rows tied with the `n`-th best score, the earliest ones are kept.
+
+    Args:
+    - matrix: A sparse matrix holding a contiguous chunk of rows.
+    - query: A sparse matrix with a single row to score against.
+    - offset: An integer representing the position of the chunk's first row in the full matrix.
+    - n: An integer representing the number of matches to keep.
+
+    Returns:
+    - A tuple of two arrays holding the row positions (in the full matrix) and scores of the matches.
+    """
+    scores = linear_kernel(matrix, query).ravel()
+    n = min(n, scores.size)
+    if n == 0:
+        return np.empty(0, dtype=np.intp), scores[:0]
+    kth = np.partition(scores, -n)[-n]
+    above = np.flatnonzero(scores > kth)
+    tied = np.flatnonzero(scores == kth)[:n - above.size]
+    cand = np.concatenate([above, tied])
+    return cand + offset, scores[cand]
+
+if njit is not None:
+    @njit(parallel=True, fastmath={'reassoc', 'contract'}, cache=True)
+    def csr_top_k(values, indices, indptr, query, n, n_chunks):
+        """
+        Get the top dot products of CSR rows against a dense query.
+        Each of the `n_chunks` contiguous row chunks runs in parallel and keeps a size-`n` min-heap of its best rows, 
+        fusing the dot products and the selection into a single pass. Ties keep the earliest rows.
+
+        Args:
+        - values, indices, indptr: The arrays of a CSR matrix.
+        - query: A dense vector to score against.
+        - n: An integer representing the number of matches to keep per chunk.
+        - n_chunks: An integer representing the number of chunks.
+
+        Returns:
+        - A tuple of two flat arrays holding the row positions and scores of every chunk's matches, unordered. 
+        Unfilled heap slots have position -1.
+        """
+        rows = indptr.size - 1
+        top_idx = np.full((n_chunks, n), -1, dtype=np.int64)
+        top_scores = np.full((n_chunks, n), -np.inf, dtype=query.dtype)
+        for c in prange(n_chunks):
+            heap_idx = top_idx[c]
+            heap_scores = top_scores[c]
+            for row in range(c * rows // n_chunks, (c + 1) * rows // n_chunks):
+                score = query.dtype.type(0)
+                for j in range(indptr[row], indptr[row + 1]):
+                    score += values[j] * query[indices[j]]
+                if score <= heap_scores[0]:
+                    continue
+                # Replace the heap's worst entry and sift it down
+                # Worse means a lower score, or an equal score on a later row, so the earliest of tied rows are kept
+                heap_idx[0] = row
+                heap_scores[0] = score
+                pos = 0
+                while True:
+                    child = 2 * pos + 1
+                    if child >= n:
+                        break
+                    right = child + 1
+                    if right < n and (heap_scores[right] < heap_scores[child] or
+                                      (heap_scores[right] == heap_scores[child] and heap_idx[right] > heap_idx[child])):
+                        child = right
+                    if heap_scores[child] > heap_scores[pos] or \
+                            (heap_scores[child] == heap_scores[pos] and heap_idx[child] < heap_idx[pos]):
+                        break
+                    heap_idx[pos], heap_idx[child] = heap_idx[child], heap_idx[pos]
+                    heap_scores[pos], heap_scores[child] = heap_scores[child], heap_scores[pos]
+                    pos = child
+        return top_idx.ravel(), top_scores.ravel()
+
+def search_similar(matrix, query, n:int, n_jobs:int = -1):
+    """
+    Search the rows most similar to a query.
+    Splits `matrix` into one chunk per worker, keeps the local top `n` of each chunk and merges them into the global top `n`. 
+    Matrices with fewer than `PARALLEL_MIN_ROWS` rows are scored in a single chunk, and with numba installed the chunks run in `csr_top_k`. 
+    Rows are scored by plain dot product, so both `matrix` and `query` are expected to have L2-normalised rows.
+
+    Args:
+    - matrix: A float32 CSR matrix to search.
+    - query: A sparse matrix with a single row to score against.
+    - n: An integer representing the number of matches to return.
+    - n_jobs: An integer representing the number of worker threads (default = -1, all cores).
+
+    Returns:
+    - An array of `n` integers representing row positions in `matrix`, best first, earliest first among equal scores.
+    """
+    rows = matrix.shape[0]
+    if njit is not None:
+        n_chunks = 1 if rows < PARALLEL_MIN_ROWS else get_num_threads()
+        cand, scores = csr_top_k(matrix.data, matrix.indices, matrix.indptr,
+                                 query.toarray().ravel().astype(matrix.dtype), min(n, rows), n_chunks)
+        found = cand >= 0
+        cand, scores = cand[found], scores[found]
+    else:
+        n_jobs = 1 if rows < PARALLEL_MIN_ROWS else effective_n_jobs(n_jobs)
+        bounds = np.linspace(0, rows, n_jobs + 1, dtype=int)
+        results = Parallel(n_jobs=n_jobs, prefer='threads')(
+            delayed(chunk_top_k)(matrix[start:stop], query, start, n)
+            for start, stop in zip(bounds[:-1], bounds[1:]) if stop > start
+        )
+        cand = np.concatenate([idx for idx, _ in results])
+        scores = np.concatenate([score for _, score in results])
+    # Ties go to the earliest row so the result does not depend on how the rows were chunked
+    best = np.lexsort((cand, -scores))[:n]
+    return cand[best]
+
+# Rank the books closest to a given book, served from the precomputed neighbours when possible
+
+def ranked_similar(bookId:str, n:int):
+    """
+    Get ranked similar book positions.
+    Takes a book ID as input and returns the row positions of the `n` most similar books, best first. 
+    The book itself is usually the first entry. Falls back to scoring the whole corpus if `n` exceeds `TOP_K`.
+
+    Args:
+    - bookId: A string representing the book ID to find similar books for.
+    - n: An integer representing the number of positions to return.
+
+    Returns:
+    - A sequence of `n` integers representing row positions in `data`.
+    """
+    i = data.index.get_loc(bookId)
+    if n <= topk_idx.shape[1]:
+        return topk_idx[i, :n]
+
+    return search_similar(tfidf_matrix, tfidf_matrix[i], n)
+
 # NLP against the book summaries
 
 def similar_summary(bookId:str, k = 5) -> list:
@@ -175,14 +617,8 @@ def similar_summary(bookId:str, k = 5) -> list:
     - A list of `k` strings representing the book IDs of the most similar books.
     """
     
-    similarity_scores = cosine_similarity(tfidf_matrix[data.index.get_loc(bookId)], tfidf_matrix)
-    similar_books = list(enumerate(similarity_scores[0]))
-    sorted_similar_books = sorted(similar_books, key=lambda x: x[1], reverse=True)
-    recommended_books = []
-    for i in range(1, k+1):
-        book_bookId = data.iloc[sorted_similar_books[i][0]].name
-        recommended_books.append(book_bookId)
-    return recommended_books
+    positions = ranked_similar(bookId, k+1)[1:k+1]
+    return book_ids[positions].tolist()
 
 # KNN against the book genres
 
@@ -190,6 +626,7 @@ def similar_genre(bookId: str, k: int = 5) -> str:
     """
     Get similar books based on genre.
     Takes a book ID as input and returns a list of the `k` most similar books based on the genre. 
+    Books are compared by the cosine similarity of their genre tags, so equally tagged books tie.
     
     Args:
     - bookId: A string representing the book ID to find similar books for.
@@ -199,14 +636,10 @@ def similar_genre(bookId: str, k: int = 5) -> str:
     - A list of `k` strings representing the book IDs of the most similar books.
     """
 
-    similarity_scores = cosine_similarity(tfidf_matrix[data.index.get_loc(bookId)], tfidf_matrix)
-    similar_books = list(enumerate(similarity_scores[0]))
-    sorted_similar_books = sorted(similar_books, key=lambda x: x[1], reverse=True)
-    recommended_books = []
-    for i in range(k+1, 2*k+1):
-        book_bookId = data.iloc[sorted_similar_books[i][0]].name
-        recommended_books.append(book_bookId)
-    return recommended_books
+    i = data.index.get_loc(bookId)
+    positions = search_similar(genre_matrix, genre_matrix[i], k+1)
+    positions = positions[positions != i][:k]
+    return book_ids[positions].tolist()
 
 # Main interface to call similarity generation
 